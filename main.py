@@ -1,20 +1,484 @@
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import Response
+from pydantic import BaseModel, field_validator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 import uuid
 import asyncio
+import hashlib
+import re
+import time
+from types import MappingProxyType
+from urllib.parse import urlparse
 from playwright.async_api import async_playwright
 import logging
-from typing import Dict, Optional
-import json
+import os
+from typing import Any, List, Literal, Optional, Sequence, get_args
+import orjson
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging; set LOG_LEVEL=WARNING in production to drop the per-request INFO lines
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="GTO Wizard Browser Controller", version="1.0.0")
+# GTO Wizard URL
+GTO_WIZARD_URL = "https://app.gtowizard.com/practice/range-builder?custree_id=929b2d3e-9830-448c-a6a4-e9218cba6504&cussol_id=cf42a022-e53a-438f-9997-02e36495104d&solution_type=gwiz&gmfs_solution_tab=ai_sols&gametype=MTTGeneral&depth=12.125&gmff_depth=100&gmfft_sort_key=0&gmfft_sort_order=desc&board=Js8d2d&history_spot=0"
 
-# Store active browser sessions
-active_sessions: Dict[str, dict] = {}
+# Elements that show the GTO Wizard app has rendered and can be interacted with
+READY_SELECTOR = "div.gmfover, div.gw_btn"
+
+# Range selector div. The specific gmfover class combination and plain div.gmfover are resolved as one
+# union; the looser class-substring matches can also hit wrapper divs, so they are only tried, in order,
+# once those have failed (gw_loading_text is also a class of every filter button, so it comes last)
+RANGE_SELECTORS = (
+    "div.gmfover.text-noselect.gw_loading_text, div.gmfover",
+    "div[class*='gmfover']",
+    "div[class*='gw_loading_text']",
+)
+
+# Selectors for the one-shot buttons at the end of /get-range, tried in order
+DIALOG_CLOSE_SELECTORS = (
+    "div[data-tst='dialog_solutions-dialog_close']",
+    "div.dialog_content_close.mdi.icon_btn.mdi-close",
+    "div.mdi-close",
+    "div[class*='dialog_content_close']",
+)
+START_BUILDING_SELECTORS = (
+    "div.gw_btn_primary.gw_btn.-v1",
+    "div[class*='gw_btn_primary'][class*='gw_btn'][class*='-v1']",
+    "div:has-text('Start building')",
+    "div:has-text('START BUILDING')",
+    "div.gw_btn_primary:has-text('Start building')",
+    "button:has-text('Start building')",
+    "button:has-text('START BUILDING')",
+    "[class*='gw_btn_primary']:has-text('Start building')",
+    "[class*='gw_btn_primary']:has-text('START BUILDING')",
+)
+CONFIRM_SELECTORS = (
+    "div.gw_btn.gw_btn_primary.text-normal.weight_500",
+    "div[class*='gw_btn'][class*='gw_btn_primary'][class*='text-normal'][class*='weight_500']",
+    "div:has-text('Confirm')",
+    "div.gw_btn_primary:has-text('Confirm')",
+    "button:has-text('Confirm')",
+    "[class*='gw_btn_primary']:has-text('Confirm')",
+)
+
+# Requests the automation never needs: aborting them saves bandwidth, decode work and memory per context
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "texttrack", "ping", "cspviolationreport"})
+# Third-party scripts, XHR/fetch calls and beacons are blocked even from hosts not listed above when a
+# host label or path segment starts with a tracker name as a whole word ("analytics.js", "/gtag/js"),
+# so longer words like "segmented-control" and matches inside query strings are left alone
+BLOCKED_URL_KEYWORDS = ("analytics", "gtag", "hotjar", "segment")
+KEYWORD_RESOURCE_TYPES = frozenset({"script", "xhr", "fetch", "ping"})
+KEYWORD_HOST_PATTERN = re.compile(r"(?:^|\.)(?:%s)(?![a-z])" % "|".join(BLOCKED_URL_KEYWORDS))
+KEYWORD_PATH_PATTERN = re.compile(r"/(?:%s)(?![a-z])" % "|".join(BLOCKED_URL_KEYWORDS))
+# Stylesheets are only blocked when they come from somewhere other than GTO Wizard itself,
+# since the app's own CSS decides whether its buttons are visible (and so clickable)
+FIRST_PARTY_DOMAIN = "gtowizard.com"
+BLOCKED_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "facebook.net",
+    "hotjar.com",
+    "segment.com",
+    "segment.io",
+    "mixpanel.com",
+    "amplitude.com",
+    "intercom.io",
+    "sentry.io",
+    "stripe.com",
+    "clarity.ms"
+)
+
+# How long (seconds) a repeated /get-range with identical options is served from cache
+RANGE_CACHE_TTL = 30
+
+# Run the shared browser without a window; set HEADLESS=0 to watch it work
+HEADLESS = os.getenv("HEADLESS", "1") != "0"
+
+# /dev/shm is tiny in most containers, and the sandbox needs privileges containers rarely grant;
+# extensions are never used, so skip loading them into every pooled context
+CHROMIUM_ARGS = ["--disable-dev-shm-usage", "--no-sandbox", "--disable-gpu", "--disable-extensions"]
+
+# CDP endpoint of an already running Chromium (e.g. http://localhost:9222). When set, every server process
+# connects to that one browser instead of launching its own, so memory scales with contexts, not processes
+BROWSER_CDP_URL = os.getenv("BROWSER_CDP_URL")
+
+# Options for every session's browser context. The user agent is set explicitly because headless
+# Chromium otherwise advertises itself as "HeadlessChrome", which sites commonly treat as a bot
+CONTEXT_OPTIONS = MappingProxyType({
+    "viewport": {"width": 1280, "height": 720},
+    "user_agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+})
+
+# Cookies and localStorage saved from the first context that renders the app and used to seed every
+# later context, so GTO Wizard skips its first-visit setup (set STORAGE_STATE_PATH to "" to disable)
+STORAGE_STATE_PATH = os.getenv("STORAGE_STATE_PATH", "gto_state.json")
+
+# Sessions idle for longer than SESSION_TTL seconds (or in the error state for longer than
+# ERROR_SESSION_TTL, or still launching after LAUNCH_SESSION_TTL) are closed by a background
+# reaper that runs every REAPER_INTERVAL seconds
+SESSION_TTL = int(os.getenv("SESSION_TTL", "1800"))
+ERROR_SESSION_TTL = 300
+LAUNCH_SESSION_TTL = 600
+REAPER_INTERVAL = 60
+
+# Upper bound on open sessions; creating one more closes the least recently used session
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "100"))
+
+# How long (seconds) /get-range waits for a still-launching session to become active
+LAUNCH_WAIT_TIMEOUT = 30
+
+# Number of pre-warmed browser contexts kept ready for /create (0 disables the pool)
+POOL_SIZE = int(os.getenv("POOL_SIZE", "2"))
+
+# Upper bound on Playwright page operations (context launches and /get-range runs) in flight at once
+# against the shared browser; further ones wait for a free slot
+MAX_CONCURRENT_PAGE_OPS = int(os.getenv("MAX_CONCURRENT_PAGE_OPS", "16"))
+
+# Map (category, request value) to the data-tst attribute of the matching button
+SELECTOR_TABLE = MappingProxyType({
+    ("solutions", "Cash"): "chrow_cash",
+    ("solutions", "MTT"): "chrow_mtt",
+    ("solutions", "Spin & Go"): "chrow_spins",
+    ("solutions", "Hu SnG"): "chrow_husng",
+    ("cash_type", "Classic"): "chrow_classic",
+    ("cash_type", "Short"): "chrow_shortstack",
+    ("cash_type", "Ante"): "chrow_ante",
+    ("cash_type", "Straddle"): "chrow_straddle",
+    ("cash_type", "Straddle+Ante"): "chrow_ante_straddle",
+    ("cash_type", "DoubleStraddle"): "chrow_double_straddle",
+    ("cash_type", "MississippiStraddle"): "chrow_mississippi_straddle",
+    ("cash_players", "Heads-up"): "chrow_hu",
+    ("cash_players", "6max"): "chrow_6max",
+    ("cash_players", "8max"): "chrow_8max",
+    ("cash_players", "9max"): "chrow_9max",
+    ("available_spots", "postflop_included"): "chrow_all_spots",
+    ("available_spots", "preflop_only"): "chrow_preflop_only",
+    ("cash_stacks", "Any"): "chrow_any",
+    ("cash_stacks", "200"): "chrow_200",
+    ("cash_stacks", "150"): "chrow_150",
+    ("cash_stacks", "100"): "chrow_100",
+    ("cash_stacks", "75"): "chrow_75",
+    ("cash_stacks", "50"): "chrow_50",
+    ("cash_stacks", "40"): "chrow_40",
+    ("cash_stacks", "20"): "chrow_20",
+    ("bet_sizes", "Any"): "chrow_any",
+    ("bet_sizes", "Simple"): "chrow_simple",
+    ("bet_sizes", "Simplified"): "chrow_simplified",
+    ("bet_sizes", "General"): "chrow_general",
+    ("rake", "Any"): "chrow_any",
+    ("rake", "NL50"): "chrow_NL50",
+    ("rake", "NL500"): "chrow_NL500",
+    ("rake", "NL50 GG"): "chrow_GG NL50",
+    ("rake", "NL1k GG"): "chrow_GG NL1k",
+    # "Any" appears in several sections, so these stages rely on more specific selectors
+    ("cash_open_size", "Any"): "chrow_any",
+    ("cash_open_size", "GTO"): "chrow_gto",
+    ("cash_open_size", "2.5x"): "chrow_25x",
+    ("cash_3bet_size", "Any"): "chrow_any",
+    ("cash_3bet_size", "GTO"): "chrow_gto",
+    ("cash_3bet_size", "Smaller"): "chrow_smaller",
+    ("hero", "Any"): None,  # "Any" has no data-tst attribute
+    ("hero", "OOP"): "chrow_oop",
+    ("hero", "IP"): "chrow_ip",
+})
+
+# Click target for every (category, value) with a data-tst: the button div or its label span.
+# Built once at import so handlers never format selector strings per request
+SELECTOR_CACHE = MappingProxyType({
+    key: f"div[data-tst='{data_tst}'], div[data-tst='{data_tst}'] span"
+    for key, data_tst in SELECTOR_TABLE.items()
+    if data_tst
+})
+
+# Rows that hold ambiguous buttons, each identified by a button only that row has. Scoping a
+# lookup to its row lets the selector engine skip the document-wide :near() layout checks, and
+# buttons without a data-tst are matched on their exact label with :text-is() rather than the
+# substring match of :has-text()
+OPENING_SIZE_ROW = "div:has(> div[data-tst='chrow_25x'])"
+THREEBET_SIZE_ROW = "div:has(> div[data-tst='chrow_smaller'])"
+HERO_ROW = "div:has(> div[data-tst='chrow_oop'])"
+
+# Ordered selector lists for buttons whose data-tst or label also appears in another row.
+# They are tried one at a time: a union would return whichever match comes first in the
+# document, which for "Any" and "GTO" is usually the wrong row's button
+AMBIGUOUS_SELECTORS = {
+    # "Any" appears in multiple sections, so look for it in the opening size section first
+    ("cash_open_size", "Any"): (
+        f"{OPENING_SIZE_ROW} > div[data-tst='chrow_any']",
+        "div:has-text('Opening'):has-text('Any')",
+        "div:has-text('Any'):near(div:has-text('Opening'))",
+        SELECTOR_CACHE[("cash_open_size", "Any")],
+        "div:has-text('Any'), div.gw_btn.gw_btn_text.gw_loading_text.cherow_row_checkbox.cherow_row_checkbox_item:has-text('Any')",
+        "text=Any",
+    ),
+    # Use "Smaller" as a reference point since it's unique to the 3bet section.
+    # The "Any" button in 3bet section has NO data-tst attribute
+    ("cash_3bet_size", "Any"): (
+        f"{THREEBET_SIZE_ROW} > div:not([data-tst]):text-is('Any')",
+        # Look for the "Any" button that comes before the "GTO" button that comes before the "Smaller" button
+        "div.gw_btn.gw_btn_text.gw_loading_text.cherow_row_checkbox.cherow_row_checkbox_item:has-text('Any'):near(div[data-tst='chrow_smaller']):not(:has([data-tst]))",
+        # Try to find "Any" button that is the first button in a row that contains "Smaller"
+        "div:has-text('Any'):near(div:has-text('Smaller')):not([data-tst])",
+        # Look for "Any" button that is near both "GTO" and "Smaller" buttons
+        "div:has-text('Any'):near(div:has-text('GTO')):near(div:has-text('Smaller'))",
+        # Fallback selectors
+        "div:has-text('Any'):near(div[data-tst='chrow_smaller'])",
+        "div:has-text('Any'), div.gw_btn.gw_btn_text.gw_loading_text.cherow_row_checkbox.cherow_row_checkbox_item:has-text('Any')",
+        "text=Any",
+    ),
+    # The "GTO" button in 3bet section has data-tst="chrow_gto" but conflicts with opening size section
+    ("cash_3bet_size", "GTO"): (
+        f"{THREEBET_SIZE_ROW} > div[data-tst='chrow_gto']",
+        # Find GTO button that is near Smaller (unique to 3bet section) but NOT near 2.5x (unique to opening section)
+        "div[data-tst='chrow_gto']:near(div[data-tst='chrow_smaller']):not(:near(div:has-text('2.5x')))",
+        # Try to find GTO button that is near Smaller but not near Opening
+        "div[data-tst='chrow_gto']:near(div[data-tst='chrow_smaller']):not(:near(div:has-text('Opening')))",
+        # Look for GTO button that is near both Any (no data-tst) and Smaller buttons
+        "div[data-tst='chrow_gto']:near(div:has-text('Any'):not([data-tst])):near(div[data-tst='chrow_smaller'])",
+        # Use CSS sibling selectors to find the GTO button that comes after Any (no data-tst) and before Smaller
+        "div:has-text('Any'):not([data-tst]) + div[data-tst='chrow_gto']",
+        "div:has-text('Any'):not([data-tst]) ~ div[data-tst='chrow_gto']",
+        # Look for GTO button that has Smaller as a sibling
+        "div[data-tst='chrow_gto']:has(+ div[data-tst='chrow_smaller'])",
+        "div[data-tst='chrow_gto']:has(~ div[data-tst='chrow_smaller'])",
+        # Look for "GTO" button that is near both "Any" and "Smaller" buttons
+        "div:has-text('GTO'):near(div:has-text('Any')):near(div:has-text('Smaller'))",
+        # Fallback selectors
+        "div:has-text('GTO'):near(div:has-text('Smaller'))",
+        "div:has-text('GTO'):near(div[data-tst='chrow_smaller'])",
+        SELECTOR_CACHE[("cash_3bet_size", "GTO")],
+        "div:has-text('GTO'), div.gw_btn.gw_btn_text.gw_loading_text.cherow_row_checkbox.cherow_row_checkbox_item:has-text('GTO')",
+        "text=GTO",
+    ),
+    # The hero "Any" button has no data-tst attribute
+    ("hero", "Any"): (
+        f"{HERO_ROW} > div:not([data-tst]):text-is('Any')",
+        "div:has-text('Any'):not([data-tst]), div.gw_btn:has-text('Any')",
+    ),
+}
+
+# Selector list used to click each (category, value): the ambiguous lists above, otherwise
+# just the button's data-tst union
+CLICK_SELECTORS = MappingProxyType({
+    key: AMBIGUOUS_SELECTORS.get(key) or (SELECTOR_CACHE[key],)
+    for key in SELECTOR_TABLE
+})
+
+# Filter rows applied after the solutions selection, one tier at a time. Rows within a tier are
+# clicked concurrently; the game format rows go first since they decide which stacks, bet sizes
+# and rake options are offered
+FILTER_TIERS = (
+    ("cash_type", "cash_players", "available_spots"),
+    ("cash_stacks", "bet_sizes", "rake"),
+)
+FILTER_CATEGORIES = sum(FILTER_TIERS, ())
+
+# action_performed slug reported for each (category, request value)
+SLUG_TABLE = MappingProxyType({
+    ("solutions", "Cash"): "clicked_cash",
+    ("solutions", "MTT"): "clicked_mtt",
+    ("solutions", "Spin & Go"): "clicked_spin_and_go",
+    ("solutions", "Hu SnG"): "clicked_hu_sng",
+    ("cash_type", "Classic"): "clicked_classic",
+    ("cash_type", "Short"): "clicked_short",
+    ("cash_type", "Ante"): "clicked_ante",
+    ("cash_type", "Straddle"): "clicked_straddle",
+    ("cash_type", "Straddle+Ante"): "clicked_straddleplusante",
+    ("cash_type", "DoubleStraddle"): "clicked_doublestraddle",
+    ("cash_type", "MississippiStraddle"): "clicked_mississippistraddle",
+    ("cash_players", "Heads-up"): "clicked_heads_up",
+    ("cash_players", "6max"): "clicked_6max",
+    ("cash_players", "8max"): "clicked_8max",
+    ("cash_players", "9max"): "clicked_9max",
+    ("available_spots", "postflop_included"): "clicked_postflop_included",
+    ("available_spots", "preflop_only"): "clicked_preflop_only",
+    ("cash_stacks", "Any"): "clicked_any",
+    ("cash_stacks", "200"): "clicked_200",
+    ("cash_stacks", "150"): "clicked_150",
+    ("cash_stacks", "100"): "clicked_100",
+    ("cash_stacks", "75"): "clicked_75",
+    ("cash_stacks", "50"): "clicked_50",
+    ("cash_stacks", "40"): "clicked_40",
+    ("cash_stacks", "20"): "clicked_20",
+    ("bet_sizes", "Any"): "clicked_any",
+    ("bet_sizes", "Simple"): "clicked_simple",
+    ("bet_sizes", "Simplified"): "clicked_simplified",
+    ("bet_sizes", "General"): "clicked_general",
+    ("rake", "Any"): "clicked_any",
+    ("rake", "NL50"): "clicked_nl50",
+    ("rake", "NL500"): "clicked_nl500",
+    ("rake", "NL50 GG"): "clicked_nl50_gg",
+    ("rake", "NL1k GG"): "clicked_nl1k_gg",
+    ("cash_open_size", "Any"): "clicked_any",
+    ("cash_open_size", "GTO"): "clicked_gto",
+    ("cash_open_size", "2.5x"): "clicked_2_5x",
+    ("cash_3bet_size", "Any"): "clicked_any",
+    ("cash_3bet_size", "GTO"): "clicked_gto",
+    ("cash_3bet_size", "Smaller"): "clicked_smaller",
+    ("hero", "Any"): "clicked_any",
+    ("hero", "OOP"): "clicked_oop",
+    ("hero", "IP"): "clicked_ip",
+})
+
+# Returns the expected data-tst values that have no element carrying gw_btn_active
+INACTIVE_BUTTONS_JS = """
+(expected) => {
+    const active = new Set(
+        Array.from(document.querySelectorAll('div[data-tst].gw_btn_active'), (el) => el.getAttribute('data-tst'))
+    );
+    return expected.filter((dataTst) => !active.has(dataTst));
+}
+"""
+# Truthy once every expected data-tst has an active element; polled in the page by wait_for_function
+ALL_BUTTONS_ACTIVE_JS = f"(expected) => ({INACTIVE_BUTTONS_JS.strip()})(expected).length === 0"
+
+# How long (milliseconds) to let the page catch up before reporting buttons that are still inactive
+ACTIVE_STATE_TIMEOUT = 2000
+
+# Clicks each data-tst button in turn inside the page, letting a frame render between clicks,
+# and returns the data-tst values that had no matching element
+CLICK_BUTTONS_JS = """
+async (dataTsts) => {
+    const missing = [];
+    for (const dataTst of dataTsts) {
+        const el = document.querySelector(`div[data-tst="${CSS.escape(dataTst)}"]`);
+        if (!el) {
+            missing.push(dataTst);
+            continue;
+        }
+        el.click();
+        await new Promise((resolve) => requestAnimationFrame(resolve));
+    }
+    return missing;
+}
+"""
+
+# Response message fragment for each (category, request value)
+BUTTON_MESSAGES = MappingProxyType({
+    (category, value): f"{value} {category} button"
+    for category, value in SLUG_TABLE
+})
+
+# Optional one-shot buttons clicked after the filters: (request flag, action slug, message fragment)
+ONE_SHOT_ACTIONS = (
+    ("close_dialog", "closed_dialog", "dialog close button"),
+    ("start_building", "clicked_start_building", "START BUILDING button"),
+    ("confirm", "clicked_confirm", "Confirm button"),
+)
+
+# Rows clicked concurrently after the filter tiers
+SIZING_CATEGORIES = ("cash_open_size", "cash_3bet_size", "hero")
+
+# Categories reported in the get-range response, in the order they are applied
+ACTION_CATEGORIES = ("solutions",) + FILTER_CATEGORIES + SIZING_CATEGORIES
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Set up the per-app session store and close any remaining browser sessions on shutdown
+    """
+    # Store active browser sessions: session_id -> Session
+    app.state.sessions = {}
+    
+    # Encoded /sessions body, rebuilt on the next listing after any session is added, removed or changes status
+    app.state.sessions_listing = None
+    
+    # Last successful /get-range per session: session_id -> (options key, timestamp, response)
+    app.state.range_cache = {}
+    
+    # Storage state saved by an earlier run, if any
+    app.state.storage_state = load_storage_state()
+    # Set by the one context that saves the storage state, so concurrent pool fills don't all write the file
+    app.state.storage_state_claimed = app.state.storage_state is not None
+    
+    # Strong references to in-flight background tasks so they are not garbage collected
+    app.state.background_tasks = set()
+    
+    # Limits concurrent page operations so a burst cannot flood the browser's CDP connection
+    app.state.page_ops = asyncio.Semaphore(MAX_CONCURRENT_PAGE_OPS)
+    
+    # One Playwright driver and browser process are shared by every session;
+    # each session only gets its own (cheap, isolated) browser context
+    app.state.playwright = await async_playwright().start()
+    if BROWSER_CDP_URL:
+        app.state.browser = await app.state.playwright.chromium.connect_over_cdp(BROWSER_CDP_URL)
+        logger.info("Connected to shared browser at %s", BROWSER_CDP_URL)
+    else:
+        app.state.browser = await app.state.playwright.chromium.launch(
+            headless=HEADLESS,
+            args=CHROMIUM_ARGS
+        )
+    
+    # Pool of (context, page) pairs that already have the GTO Wizard URL loaded
+    app.state.pool = asyncio.Queue(maxsize=POOL_SIZE)
+    # Number of fill_pool tasks in flight, so top-ups never warm more contexts than there are free slots
+    app.state.pool_refills = 0
+    refill_pool()
+    
+    spawn_background_task(reap_sessions())
+    
+    yield
+    
+    # Cancel launches and pool refills that are still in flight
+    for task in app.state.background_tasks:
+        task.cancel()
+    await asyncio.gather(*app.state.background_tasks, return_exceptions=True)
+    
+    async def close_on_shutdown(session_id, session_info):
+        try:
+            await close_session_resources(session_info)
+            logger.info("Closed browser session on shutdown: %s", session_id)
+        except Exception as e:
+            logger.error("Error closing session %s on shutdown: %s", session_id, e)
+    
+    # Contexts are independent of each other, so close every session and pooled context at once
+    pooled_contexts = []
+    while not app.state.pool.empty():
+        context, _ = app.state.pool.get_nowait()
+        pooled_contexts.append(context)
+    
+    await asyncio.gather(
+        *(close_on_shutdown(session_id, session_info) for session_id, session_info in app.state.sessions.items()),
+        *(context.close() for context in pooled_contexts),
+        return_exceptions=True
+    )
+    app.state.sessions.clear()
+    
+    await app.state.browser.close()
+    await app.state.playwright.stop()
+
+app = FastAPI(
+    title="GTO Wizard Browser Controller",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+def spawn_background_task(coro) -> asyncio.Task:
+    """
+    Start a background task and keep a reference to it until it finishes
+    """
+    task = asyncio.create_task(coro)
+    app.state.background_tasks.add(task)
+    task.add_done_callback(app.state.background_tasks.discard)
+    return task
+
+@dataclass(slots=True)
+class Session:
+    """
+    A browser session tracked in app.state.sessions
+    """
+    status: str  # "launching", "active" or "error"
+    url: str
+    created_at: float  # Wall-clock (time.time()) so clients can display it
+    last_used_at: float  # time.monotonic(), only used to measure idle time
+    worker_pid: int = field(default_factory=os.getpid)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)  # Serializes page work for this session
+    ready: asyncio.Event = field(default_factory=asyncio.Event)  # Set once the launch has finished, successfully or not
+    context: Optional[Any] = None
+    page: Optional[Any] = None
+    error: Optional[str] = None
 
 class CreateRequest(BaseModel):
     action: str = "create"
@@ -27,19 +491,38 @@ class CreateResponse(BaseModel):
 class GetRangeRequest(BaseModel):
     action: str = "get-range"
     session_id: str
-    solutions: Optional[str] = None  # Can be: "Cash", "MTT", "Spin & Go", "Hu SnG" or None
-    cash_type: Optional[str] = None  # Can be: "Classic", "Short", "Ante", "Straddle", "Straddle+Ante", "DoubleStraddle", "MississippiStraddle" or None
-    cash_players: Optional[str] = None  # Can be: "Heads-up", "6max", "8max", "9max" or None
-    available_spots: Optional[str] = None  # Can be: "postflop_included", "preflop_only" or None
-    cash_stacks: Optional[str] = None  # Can be: "Any", "200", "150", "100", "75", "50", "40", "20" or None
-    bet_sizes: Optional[str] = None  # Can be: "Any", "Simple", "Simplified", "General" or None
-    rake: Optional[str] = None  # Can be: "Any", "NL50", "NL500", "NL50 GG", "NL1k GG" or None
-    cash_open_size: Optional[str] = None  # Can be: "Any", "GTO", "2.5x" or None
-    cash_3bet_size: Optional[str] = None  # Can be: "Any", "GTO", "Smaller" or None
-    hero: Optional[str] = None  # Can be: "Any", "OOP", "IP" or None
+    solutions: Optional[Literal["Cash", "MTT", "Spin & Go", "Hu SnG"]] = None
+    cash_type: Optional[Literal["Classic", "Short", "Ante", "Straddle", "Straddle+Ante", "DoubleStraddle", "MississippiStraddle"]] = None
+    cash_players: Optional[Literal["Heads-up", "6max", "8max", "9max"]] = None
+    available_spots: Optional[Literal["postflop_included", "preflop_only"]] = None
+    cash_stacks: Optional[Literal["Any", "200", "150", "100", "75", "50", "40", "20"]] = None
+    bet_sizes: Optional[Literal["Any", "Simple", "Simplified", "General"]] = None
+    rake: Optional[Literal["Any", "NL50", "NL500", "NL50 GG", "NL1k GG"]] = None
+    cash_open_size: Optional[Literal["Any", "GTO", "2.5x"]] = None
+    cash_3bet_size: Optional[Literal["Any", "GTO", "Smaller"]] = None
+    hero: Optional[Literal["Any", "OOP", "IP"]] = None
     close_dialog: Optional[bool] = None  # Can be: True to close dialog, False or None to skip
     start_building: Optional[bool] = None  # Can be: True to click START BUILDING button, False or None to skip
     confirm: Optional[bool] = None  # Can be: True to click Confirm button, False or None to skip
+    
+    @field_validator(
+        "solutions", "cash_type", "cash_players", "available_spots", "cash_stacks",
+        "bet_sizes", "rake", "cash_open_size", "cash_3bet_size", "hero",
+        mode="before"
+    )
+    @classmethod
+    def blank_to_none(cls, value):
+        """
+        Treat an empty string as "skip this selection", same as leaving the field out
+        """
+        if isinstance(value, str) and not value.strip():
+            return None
+        return value
+
+# Every value a GetRangeRequest option accepts must have a button to click, and vice versa
+for _category in ACTION_CATEGORIES:
+    _literal = get_args(GetRangeRequest.model_fields[_category].annotation)[0]
+    assert set(get_args(_literal)) == {value for cat, value in SELECTOR_TABLE if cat == _category}, _category
 
 class GetRangeResponse(BaseModel):
     session_id: str
@@ -60,23 +543,62 @@ async def create_browser_session(request: CreateRequest):
         raise HTTPException(status_code=400, detail="Action must be 'create'")
     
     try:
+        # Make room by closing the least recently used sessions
+        while app.state.sessions and len(app.state.sessions) >= MAX_SESSIONS:
+            oldest_id = min(app.state.sessions, key=lambda sid: app.state.sessions[sid].last_used_at)
+            await end_session(oldest_id)
+            logger.info("Evicted least recently used browser session %s (limit %s)", oldest_id, MAX_SESSIONS)
+        
         # Generate unique session ID
         session_id = str(uuid.uuid4())
         
-        # GTO Wizard URL
-        gto_wizard_url = "https://app.gtowizard.com/practice/range-builder?custree_id=929b2d3e-9830-448c-a6a4-e9218cba6504&cussol_id=cf42a022-e53a-438f-9997-02e36495104d&solution_type=gwiz&gmfs_solution_tab=ai_sols&gametype=MTTGeneral&depth=12.125&gmff_depth=100&gmfft_sort_key=0&gmfft_sort_order=desc&board=Js8d2d&history_spot=0"
+        # Hand out a pre-warmed page if the pool has one ready
+        warm = None
+        while warm is None and not app.state.pool.empty():
+            context, page = app.state.pool.get_nowait()
+            if page.is_closed():
+                await context.close()
+            else:
+                warm = (context, page)
+        
+        if warm is not None:
+            context, page = warm
+            session_info = Session(
+                status="active",
+                url=GTO_WIZARD_URL,
+                created_at=time.time(),
+                last_used_at=time.monotonic(),
+                context=context,
+                page=page
+            )
+            session_info.ready.set()
+            app.state.sessions[session_id] = session_info
+            app.state.sessions_listing = None
+            
+            # Replace the page we just handed out
+            refill_pool()
+            
+            logger.info("Created new browser session from warm pool: %s", session_id)
+            
+            return CreateResponse(
+                session_id=session_id,
+                status="active",
+                message="Browser session created successfully from a pre-warmed browser context."
+            )
         
         # Launch browser in background
-        asyncio.create_task(launch_browser_session(session_id, gto_wizard_url))
+        spawn_background_task(launch_browser_session(session_id, GTO_WIZARD_URL))
         
         # Store session info
-        active_sessions[session_id] = {
-            "status": "launching",
-            "url": gto_wizard_url,
-            "created_at": asyncio.get_event_loop().time()
-        }
+        app.state.sessions[session_id] = Session(
+            status="launching",
+            url=GTO_WIZARD_URL,
+            created_at=time.time(),
+            last_used_at=time.monotonic()
+        )
+        app.state.sessions_listing = None
         
-        logger.info(f"Created new browser session: {session_id}")
+        logger.info("Created new browser session: %s", session_id)
         
         return CreateResponse(
             session_id=session_id,
@@ -85,9 +607,139 @@ async def create_browser_session(request: CreateRequest):
         )
         
     except Exception as e:
-        logger.error(f"Error creating browser session: {str(e)}")
+        logger.error("Error creating browser session: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to create browser session: {str(e)}")
 
+async def _click_with_fallbacks(
+    page,
+    selectors: Sequence[str],
+    label: str,
+    timeout: int = 5000,
+    fallback_timeout: int = 800
+) -> Optional[Any]:
+    """
+    Click the first visible match of each selector in turn until one succeeds, returning the
+    locator that was clicked (or None if no selector matched)
+
+    A selector may be a comma-separated union; Playwright resolves the whole union
+    in the browser in a single call and returns the first match in document order.
+    Only the first selector gets the full timeout to wait for the page to render: once it
+    has timed out the page has settled, so the fallbacks either match straight away or not at all.
+    """
+    locator = page.locator
+    for attempt, selector in enumerate(selectors):
+        try:
+            logger.debug("Trying %s selector: %s", label, selector)
+            # click() already waits for the element to be visible and actionable
+            target = locator(selector).first
+            await target.click(timeout=timeout if attempt == 0 else fallback_timeout)
+            logger.debug("Successfully clicked %s button using selector: %s", label, selector)
+            return target
+        except Exception as e:
+            logger.debug("%s selector %s failed: %s", label, selector, e)
+            continue
+    
+    return None
+
+async def log_page_buttons(page):
+    """
+    Log the first few buttons on the page to help debug a button that could not be found
+    """
+    # Collecting this costs several browser round-trips, so skip it entirely unless it will be logged
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    
+    try:
+        all_buttons = await page.query_selector_all("div[class*='btn'], button")
+        logger.debug("Found %s buttons on the page", len(all_buttons))
+        for i, btn in enumerate(all_buttons[:5]):  # Log first 5 buttons
+            try:
+                text = await btn.text_content()
+                classes = await btn.get_attribute("class")
+                logger.debug("Button %s: text='%s', classes='%s'", i+1, text, classes)
+            except:
+                pass
+    except Exception as debug_e:
+        logger.debug("Debug info failed: %s", debug_e)
+
+async def wait_until_active(page, data_tst_values: Sequence[str]) -> bool:
+    """
+    Wait, polling inside the page, for clicked data-tst buttons to pick up the gw_btn_active class
+    """
+    try:
+        await page.wait_for_function(ALL_BUTTONS_ACTIVE_JS, arg=list(data_tst_values), timeout=ACTIVE_STATE_TIMEOUT)
+        return True
+    except Exception as e:
+        logger.debug("Buttons %s did not all become active: %s", data_tst_values, e)
+        return False
+
+async def log_inactive_buttons(page, plan):
+    """
+    Check in one round-trip that every clicked data-tst button picked up the gw_btn_active class,
+    giving any that haven't yet a short in-page poll before warning about them
+
+    The sizing rows are left out: their buttons share data-tst values with other rows (or have
+    none), so a page-wide data-tst check could pass on another row's active button.
+    """
+    checked = [(category, value, data_tst) for category, value, data_tst in plan if data_tst and category not in SIZING_CATEGORIES]
+    expected = [data_tst for _, _, data_tst in checked]
+    if not expected:
+        return
+    
+    try:
+        inactive = await page.evaluate(INACTIVE_BUTTONS_JS, expected)
+        if inactive:
+            # Some clicks may still be re-rendering: poll inside the page rather than round-tripping
+            try:
+                await page.wait_for_function(ALL_BUTTONS_ACTIVE_JS, arg=inactive, timeout=ACTIVE_STATE_TIMEOUT)
+                inactive = []
+            except Exception:
+                inactive = await page.evaluate(INACTIVE_BUTTONS_JS, inactive)
+    except Exception as e:
+        logger.warning("Could not verify active buttons: %s", e)
+        return
+    
+    for category, value, data_tst in checked:
+        if data_tst in inactive:
+            logger.warning("Could not verify that %s %s button is active, but click was attempted", value, category)
+
+async def click_buttons_in_page(page, clicks) -> List[bool]:
+    """
+    Click several (category, value, data-tst) buttons in one round-trip
+
+    Buttons the page has not rendered yet are retried with a regular locator click,
+    which waits for them to appear.
+    """
+    try:
+        missing = set(await page.evaluate(CLICK_BUTTONS_JS, [data_tst for _, _, data_tst in clicks]))
+    except Exception as e:
+        logger.debug("In-page click batch failed, falling back to locator clicks: %s", e)
+        missing = {data_tst for _, _, data_tst in clicks}
+    
+    retry = [(category, value) for category, value, data_tst in clicks if data_tst in missing]
+    results = await asyncio.gather(*(click_button(page, category, value) for category, value in retry))
+    failed = {key for key, clicked in zip(retry, results) if not clicked}
+    
+    return [(category, value) not in failed for category, value, _ in clicks]
+
+async def click_sizing_button(page, category: str, value: str):
+    """
+    Click an opening size, 3bet size or hero button, logging a warning if none of its selectors match
+    """
+    logger.debug("Now clicking on %s button for: %s", category, value)
+    
+    if await _click_with_fallbacks(page, CLICK_SELECTORS[(category, value)], category) is None:
+        logger.warning("Could not find or click %s button for %s, skipping this action", category, value)
+
+async def click_button(page, category: str, value: str) -> bool:
+    """
+    Click a filter button by its data-tst attribute
+
+    The data-tst union is pure CSS, so it is resolved with one querySelectorAll in the page;
+    text fallbacks would make the browser walk every element and are not needed here.
+    """
+    return await _click_with_fallbacks(page, CLICK_SELECTORS[(category, value)], category) is not None
+
 @app.post("/get-range", response_model=GetRangeResponse)
 async def get_range_action(request: GetRangeRequest):
     """
@@ -98,1039 +750,497 @@ async def get_range_action(request: GetRangeRequest):
     
     session_id = request.session_id
     
-    if session_id not in active_sessions:
+    if session_id not in app.state.sessions:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session_info = active_sessions[session_id]
+    session_info = app.state.sessions[session_id]
     
-    if session_info["status"] != "active":
+    if session_info.status == "launching":
+        # Give a freshly created session the chance to finish loading instead of failing straight away
+        try:
+            await asyncio.wait_for(session_info.ready.wait(), timeout=LAUNCH_WAIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+        if app.state.sessions.get(session_id) is not session_info:
+            raise HTTPException(status_code=404, detail="Session not found")
+    
+    if session_info.status != "active":
         raise HTTPException(status_code=400, detail="Session is not active")
     
+    # Resolve every requested option up front; the request model only admits values in SELECTOR_TABLE
+    plan = [
+        (category, value, SELECTOR_TABLE[(category, value)])
+        for category in ACTION_CATEGORIES
+        if (value := getattr(request, category))
+    ]
+    
+    # One-shot actions (closing the dialog, START BUILDING, Confirm) change the page in ways a
+    # repeat call cannot assume, so only pure filter selections are served from cache
+    cacheable = not any(getattr(request, field_name) for field_name, _, _ in ONE_SHOT_ACTIONS)
+    cache_key = hashlib.blake2b(
+        orjson.dumps(request.model_dump(exclude={"action"}), option=orjson.OPT_SORT_KEYS)
+    ).hexdigest()
+    
+    cached = app.state.range_cache.pop(session_id, None)
+    if cacheable and cached is not None:
+        key, cached_at, cached_response = cached
+        if key == cache_key and time.monotonic() - cached_at < RANGE_CACHE_TTL:
+            # The same options were just applied to this page; nothing to click
+            app.state.range_cache[session_id] = cached
+            logger.info("Serving cached get-range result for session %s", session_id)
+            return cached_response
+    
+    # Page work is serialized per session so closing or reaping never tears the page down mid-click
+    lock = session_info.lock
+    await lock.acquire()
+    if app.state.sessions.get(session_id) is not session_info:
+        # The session was closed while we were waiting for the lock
+        lock.release()
+        raise HTTPException(status_code=404, detail="Session not found")
+    session_info.last_used_at = time.monotonic()
+    
+    # Taken after the session lock so requests queued on a busy session do not hold a slot
+    page_ops = app.state.page_ops
     try:
-        page = session_info["page"]
+        await page_ops.acquire()
+    except BaseException:
+        # Cancelled while queued for a slot: release the session lock, or closing and reaping
+        # the session would wait on it forever
+        lock.release()
+        raise
+    
+    try:
+        page = session_info.page
         
-        # Wait for the page to be fully loaded
-        logger.info(f"Waiting for GTO Wizard page to load in session {session_id}")
+        logger.info("Starting get-range in session %s", session_id)
         
         # Wait for the page to be ready - look for any GTO Wizard specific elements
         try:
-            # Wait for any GTO Wizard button to be present (this indicates the page is loaded)
-            await page.wait_for_selector("div.gw_btn", state="visible", timeout=10000)
-            logger.info("GTO Wizard page loaded successfully")
+            # Wait for any GTO Wizard button to be present (this indicates the page is loaded).
+            # Presence is enough here: every click that follows waits for its own button to be visible
+            await page.wait_for_selector("div.gw_btn", state="attached", timeout=10000)
+            logger.debug("GTO Wizard page loaded successfully")
         except Exception as e:
-            logger.warning(f"Could not find GTO Wizard buttons, but continuing: {str(e)}")
+            logger.warning("Could not find GTO Wizard buttons, but continuing: %s", e)
         
         # Try to find and click the range selector div, but don't fail if we can't find it
-        logger.info(f"Looking for GTO Wizard range selector div in session {session_id}")
-        
-        # Try multiple selectors to find the range selector div
-        selectors = [
-            "div.gmfover.text-noselect.gw_loading_text",
-            "div.gmfover",
-            "div[class*='gmfover']",
-            "div[class*='gw_loading_text']"
-        ]
-        
-        element_found = False
-        for selector in selectors:
-            try:
-                # Wait for the element to be visible and clickable
-                element = await page.wait_for_selector(selector, state="visible", timeout=3000)
-                if element:
-                    # Click on the div
-                    await element.click()
-                    element_found = True
-                    logger.info(f"Successfully clicked using selector: {selector}")
-                    break
-            except Exception as e:
-                logger.warning(f"Selector {selector} failed: {str(e)}")
-                continue
+        logger.debug("Looking for GTO Wizard range selector div in session %s", session_id)
+        range_click = _click_with_fallbacks(page, RANGE_SELECTORS, "range selector", timeout=3000)
+        if request.solutions:
+            # Wait for the solutions button while the range click is still in flight, so it can be
+            # clicked as soon as the range click returns instead of after another render round-trip.
+            # A failed wait is fine: click_button below retries with its own fallbacks
+            solutions_visible = page.locator(CLICK_SELECTORS[("solutions", request.solutions)][0]).first.wait_for(
+                state="visible", timeout=3000
+            )
+            range_clicked, _ = await asyncio.gather(range_click, solutions_visible, return_exceptions=True)
+        else:
+            range_clicked = await range_click
         
-        if not element_found:
+        if range_clicked is None or isinstance(range_clicked, BaseException):
             logger.warning("Could not find or click on any range selector div, but continuing with other actions")
         
         # Only perform the solutions click if the solutions parameter is provided and not empty
-        if request.solutions and request.solutions.strip():
-            logger.info(f"Now clicking on solutions button for: {request.solutions}")
+        if request.solutions:
+            logger.debug("Now clicking on solutions button for: %s", request.solutions)
             
-            # Map solutions to their corresponding data-tst attributes
-            solutions_map = {
-                "Cash": "chrow_cash",
-                "MTT": "chrow_mtt", 
-                "Spin & Go": "chrow_spins",
-                "Hu SnG": "chrow_husng"
-            }
-            
-            if request.solutions not in solutions_map:
-                raise Exception(f"Invalid solutions value: {request.solutions}. Must be one of: Cash, MTT, Spin & Go, Hu SnG")
-            
-            data_tst_value = solutions_map[request.solutions]
-            
-            # Try multiple selectors for the solutions button
-            solutions_selectors = [
-                f"div[data-tst='{data_tst_value}']",
-                f"div[data-tst='{data_tst_value}'] span",
-                f"div:has-text('{request.solutions}')",
-                f"text={request.solutions}",
-                f"div.gw_btn.gw_btn_text.gw_loading_text.cherow_row_checkbox.cherow_row_checkbox_item:has-text('{request.solutions}')"
-            ]
-            
-            solutions_clicked = False
-            for selector in solutions_selectors:
-                try:
-                    logger.info(f"Trying solutions selector: {selector}")
-                    element = await page.wait_for_selector(selector, state="visible", timeout=5000)
-                    if element:
-                        await element.click()
-                        logger.info(f"Successfully clicked on solutions button for {request.solutions}")
-                        
-                        # Wait a moment for the click to register
-                        await page.wait_for_timeout(1000)
-                        
-                        # Verify that the button is now active
-                        active_selector = f"div[data-tst='{data_tst_value}'].gw_btn_active"
-                        try:
-                            await page.wait_for_selector(active_selector, state="visible", timeout=3000)
-                            logger.info(f"Verified that {request.solutions} button is now active")
-                        except:
-                            logger.warning(f"Could not verify that {request.solutions} button is active, but click was successful")
-                        
-                        solutions_clicked = True
-                        break
-                except Exception as e:
-                    logger.info(f"Solutions selector {selector} failed: {str(e)}")
-                    continue
-            
-            if not solutions_clicked:
-                logger.warning(f"Could not find or click solutions button for {request.solutions}, skipping this action")
-            
-            logger.info(f"Successfully clicked on range selector div and {request.solutions} solutions button in session {session_id}")
+            if not await click_button(page, "solutions", request.solutions):
+                logger.warning("Could not find or click solutions button for %s, skipping this action", request.solutions)
+            else:
+                # The filter rows below are rendered for the chosen solution type, so let the
+                # selection land before clicking them
+                await wait_until_active(page, [SELECTOR_TABLE[("solutions", request.solutions)]])
             
-            # Continue to cash_type logic if solutions was successful
-            pass
+            logger.debug("Successfully clicked on range selector div and %s solutions button in session %s", request.solutions, session_id)
         else:
             # No solutions parameter provided or empty, just continue to cash_type logic
-            logger.info(f"No solutions parameter provided or empty - skipping solutions selection. Successfully clicked on range selector div in session {session_id}")
-        
-        # Handle cash_type clicking if provided
-        if request.cash_type and request.cash_type.strip():
-            logger.info(f"Now clicking on cash_type button for: {request.cash_type}")
-            
-            # Map cash_type to their corresponding data-tst attributes
-            cash_type_map = {
-                "Classic": "chrow_classic",
-                "Short": "chrow_shortstack", 
-                "Ante": "chrow_ante",
-                "Straddle": "chrow_straddle",
-                "Straddle+Ante": "chrow_ante_straddle",
-                "DoubleStraddle": "chrow_double_straddle",
-                "MississippiStraddle": "chrow_mississippi_straddle"
-            }
-            
-            if request.cash_type not in cash_type_map:
-                raise Exception(f"Invalid cash_type value: {request.cash_type}. Must be one of: Classic, Short, Ante, Straddle, Straddle+Ante, DoubleStraddle, MississippiStraddle")
-            
-            data_tst_value = cash_type_map[request.cash_type]
-            
-            # Try multiple selectors for the cash_type button
-            cash_type_selectors = [
-                f"div[data-tst='{data_tst_value}']",
-                f"div[data-tst='{data_tst_value}'] span",
-                f"div:has-text('{request.cash_type}')",
-                f"text={request.cash_type}",
-                f"div.gw_btn.gw_btn_text.gw_loading_text.cherow_row_checkbox.cherow_row_checkbox_item:has-text('{request.cash_type}')"
-            ]
-            
-            cash_type_clicked = False
-            for selector in cash_type_selectors:
-                try:
-                    logger.info(f"Trying cash_type selector: {selector}")
-                    element = await page.wait_for_selector(selector, state="visible", timeout=5000)
-                    if element:
-                        await element.click()
-                        logger.info(f"Successfully clicked on cash_type button for {request.cash_type}")
-                        
-                        # Wait a moment for the click to register
-                        await page.wait_for_timeout(1000)
-                        
-                        # Verify that the button is now active
-                        active_selector = f"div[data-tst='{data_tst_value}'].gw_btn_active"
-                        try:
-                            await page.wait_for_selector(active_selector, state="visible", timeout=3000)
-                            logger.info(f"Verified that {request.cash_type} button is now active")
-                        except:
-                            logger.warning(f"Could not verify that {request.cash_type} button is active, but click was successful")
-                        
-                        cash_type_clicked = True
-                        break
-                except Exception as e:
-                    logger.info(f"Cash_type selector {selector} failed: {str(e)}")
-                    continue
-            
-            if not cash_type_clicked:
-                logger.warning(f"Could not find or click cash_type button for {request.cash_type}, skipping this action")
-        
-        # Handle cash_players clicking if provided
-        if request.cash_players and request.cash_players.strip():
-            logger.info(f"Now clicking on cash_players button for: {request.cash_players}")
-            
-            # Map cash_players to their corresponding data-tst attributes
-            cash_players_map = {
-                "Heads-up": "chrow_hu",
-                "6max": "chrow_6max", 
-                "8max": "chrow_8max",
-                "9max": "chrow_9max"
-            }
-            
-            if request.cash_players not in cash_players_map:
-                raise Exception(f"Invalid cash_players value: {request.cash_players}. Must be one of: Heads-up, 6max, 8max, 9max")
-            
-            data_tst_value = cash_players_map[request.cash_players]
-            
-            # Try multiple selectors for the cash_players button
-            cash_players_selectors = [
-                f"div[data-tst='{data_tst_value}']",
-                f"div[data-tst='{data_tst_value}'] span",
-                f"div:has-text('{request.cash_players}')",
-                f"text={request.cash_players}",
-                f"div.gw_btn.gw_btn_text.gw_loading_text.cherow_row_checkbox.cherow_row_checkbox_item:has-text('{request.cash_players}')"
-            ]
-            
-            cash_players_clicked = False
-            for selector in cash_players_selectors:
-                try:
-                    logger.info(f"Trying cash_players selector: {selector}")
-                    element = await page.wait_for_selector(selector, state="visible", timeout=5000)
-                    if element:
-                        await element.click()
-                        logger.info(f"Successfully clicked on cash_players button for {request.cash_players}")
-                        
-                        # Wait a moment for the click to register
-                        await page.wait_for_timeout(1000)
-                        
-                        # Verify that the button is now active
-                        active_selector = f"div[data-tst='{data_tst_value}'].gw_btn_active"
-                        try:
-                            await page.wait_for_selector(active_selector, state="visible", timeout=3000)
-                            logger.info(f"Verified that {request.cash_players} button is now active")
-                        except:
-                            logger.warning(f"Could not verify that {request.cash_players} button is active, but click was successful")
-                        
-                        cash_players_clicked = True
-                        break
-                except Exception as e:
-                    logger.info(f"Cash_players selector {selector} failed: {str(e)}")
-                    continue
-            
-            if not cash_players_clicked:
-                logger.warning(f"Could not find or click cash_players button for {request.cash_players}, skipping this action")
+            logger.debug("No solutions parameter provided or empty - skipping solutions selection. Successfully clicked on range selector div in session %s", session_id)
         
-        # Handle available_spots clicking if provided
-        if request.available_spots and request.available_spots.strip():
-            logger.info(f"Now clicking on available_spots button for: {request.available_spots}")
-            
-            # Map available_spots to their corresponding data-tst attributes and display text
-            available_spots_map = {
-                "postflop_included": {"data_tst": "chrow_all_spots", "display_text": "Postflop included"},
-                "preflop_only": {"data_tst": "chrow_preflop_only", "display_text": "Preflop only"}
-            }
-            
-            if request.available_spots not in available_spots_map:
-                raise Exception(f"Invalid available_spots value: {request.available_spots}. Must be one of: postflop_included, preflop_only")
-            
-            data_tst_value = available_spots_map[request.available_spots]["data_tst"]
-            display_text = available_spots_map[request.available_spots]["display_text"]
-            
-            # Try multiple selectors for the available_spots button
-            available_spots_selectors = [
-                f"div[data-tst='{data_tst_value}']",
-                f"div[data-tst='{data_tst_value}'] span",
-                f"div:has-text('{display_text}')",
-                f"text={display_text}",
-                f"div.gw_btn.gw_btn_text.gw_loading_text.cherow_row_checkbox.cherow_row_checkbox_item:has-text('{display_text}')"
-            ]
+        # The filter rows are independent checkbox groups within a tier, so each tier's
+        # clicks are made in the page in a single batch. A tier decides what the next one offers,
+        # so the next tier starts only once this tier's buttons have turned active
+        last_tier = FILTER_TIERS[-1]
+        for tier in FILTER_TIERS:
+            filter_clicks = []
+            for category, value, data_tst_value in plan:
+                if category in tier:
+                    logger.debug("Queueing %s button click for: %s", category, value)
+                    filter_clicks.append((category, value, data_tst_value))
+            
+            if not filter_clicks:
+                continue
             
-            available_spots_clicked = False
-            for selector in available_spots_selectors:
-                try:
-                    logger.info(f"Trying available_spots selector: {selector}")
-                    element = await page.wait_for_selector(selector, state="visible", timeout=5000)
-                    if element:
-                        await element.click()
-                        logger.info(f"Successfully clicked on available_spots button for {request.available_spots}")
-                        
-                        # Wait a moment for the click to register
-                        await page.wait_for_timeout(1000)
-                        
-                        # Verify that the button is now active
-                        active_selector = f"div[data-tst='{data_tst_value}'].gw_btn_active"
-                        try:
-                            await page.wait_for_selector(active_selector, state="visible", timeout=3000)
-                            logger.info(f"Verified that {request.available_spots} button is now active")
-                        except:
-                            logger.warning(f"Could not verify that {request.available_spots} button is active, but click was successful")
-                        
-                        available_spots_clicked = True
-                        break
-                except Exception as e:
-                    logger.info(f"Available_spots selector {selector} failed: {str(e)}")
-                    continue
+            results = await click_buttons_in_page(page, filter_clicks)
+            for (label, value, _), clicked in zip(filter_clicks, results):
+                if not clicked:
+                    logger.warning("Could not find or click %s button for %s, skipping this action", label, value)
             
-            if not available_spots_clicked:
-                logger.warning(f"Could not find or click available_spots button for {request.available_spots}, skipping this action")
+            clicked_data_tst = [data_tst for (_, _, data_tst), clicked in zip(filter_clicks, results) if clicked]
+            if tier is not last_tier and clicked_data_tst:
+                await wait_until_active(page, clicked_data_tst)
         
-        # Handle cash_stacks clicking if provided
-        if request.cash_stacks and request.cash_stacks.strip():
-            logger.info(f"Now clicking on cash_stacks button for: {request.cash_stacks}")
-            
-            # Map cash_stacks to their corresponding data-tst attributes
-            cash_stacks_map = {
-                "Any": "chrow_any",
-                "200": "chrow_200",
-                "150": "chrow_150", 
-                "100": "chrow_100",
-                "75": "chrow_75",
-                "50": "chrow_50",
-                "40": "chrow_40",
-                "20": "chrow_20"
-            }
-            
-            if request.cash_stacks not in cash_stacks_map:
-                raise Exception(f"Invalid cash_stacks value: {request.cash_stacks}. Must be one of: Any, 200, 150, 100, 75, 50, 40, 20")
-            
-            data_tst_value = cash_stacks_map[request.cash_stacks]
-            
-            # Try multiple selectors for the cash_stacks button
-            cash_stacks_selectors = [
-                f"div[data-tst='{data_tst_value}']",
-                f"div[data-tst='{data_tst_value}'] span",
-                f"div:has-text('{request.cash_stacks}')",
-                f"text={request.cash_stacks}",
-                f"div.gw_btn.gw_btn_text.gw_loading_text.cherow_row_checkbox.cherow_row_checkbox_item:has-text('{request.cash_stacks}')"
-            ]
-            
-            cash_stacks_clicked = False
-            for selector in cash_stacks_selectors:
-                try:
-                    logger.info(f"Trying cash_stacks selector: {selector}")
-                    element = await page.wait_for_selector(selector, state="visible", timeout=5000)
-                    if element:
-                        await element.click()
-                        logger.info(f"Successfully clicked on cash_stacks button for {request.cash_stacks}")
-                        
-                        # Wait a moment for the click to register
-                        await page.wait_for_timeout(1000)
-                        
-                        # Verify that the button is now active
-                        active_selector = f"div[data-tst='{data_tst_value}'].gw_btn_active"
-                        try:
-                            await page.wait_for_selector(active_selector, state="visible", timeout=3000)
-                            logger.info(f"Verified that {request.cash_stacks} button is now active")
-                        except:
-                            logger.warning(f"Could not verify that {request.cash_stacks} button is active, but click was successful")
-                        
-                        cash_stacks_clicked = True
-                        break
-                except Exception as e:
-                    logger.info(f"Cash_stacks selector {selector} failed: {str(e)}")
-                    continue
-            
-            if not cash_stacks_clicked:
-                logger.warning(f"Could not find or click cash_stacks button for {request.cash_stacks}, skipping this action")
+        # The opening size, 3bet size and hero rows are separate rows that don't re-render each
+        # other, so they are clicked concurrently, each with its own ordered selector list
+        await asyncio.gather(*(
+            click_sizing_button(page, category, value)
+            for category, value, _ in plan
+            if category in SIZING_CATEGORIES
+        ))
         
-        # Handle bet_sizes clicking if provided
-        if request.bet_sizes and request.bet_sizes.strip():
-            logger.info(f"Now clicking on bet_sizes button for: {request.bet_sizes}")
-            
-            # Map bet_sizes to their corresponding data-tst attributes
-            bet_sizes_map = {
-                "Any": "chrow_any",
-                "Simple": "chrow_simple",
-                "Simplified": "chrow_simplified", 
-                "General": "chrow_general"
-            }
-            
-            if request.bet_sizes not in bet_sizes_map:
-                raise Exception(f"Invalid bet_sizes value: {request.bet_sizes}. Must be one of: Any, Simple, Simplified, General")
-            
-            data_tst_value = bet_sizes_map[request.bet_sizes]
-            
-            # Try multiple selectors for the bet_sizes button
-            bet_sizes_selectors = [
-                f"div[data-tst='{data_tst_value}']",
-                f"div[data-tst='{data_tst_value}'] span",
-                f"div:has-text('{request.bet_sizes}')",
-                f"text={request.bet_sizes}",
-                f"div.gw_btn.gw_btn_text.gw_loading_text.cherow_row_checkbox.cherow_row_checkbox_item:has-text('{request.bet_sizes}')"
-            ]
-            
-            bet_sizes_clicked = False
-            for selector in bet_sizes_selectors:
-                try:
-                    logger.info(f"Trying bet_sizes selector: {selector}")
-                    element = await page.wait_for_selector(selector, state="visible", timeout=5000)
-                    if element:
-                        await element.click()
-                        logger.info(f"Successfully clicked on bet_sizes button for {request.bet_sizes}")
-                        
-                        # Wait a moment for the click to register
-                        await page.wait_for_timeout(1000)
-                        
-                        # Verify that the button is now active
-                        active_selector = f"div[data-tst='{data_tst_value}'].gw_btn_active"
-                        try:
-                            await page.wait_for_selector(active_selector, state="visible", timeout=3000)
-                            logger.info(f"Verified that {request.bet_sizes} button is now active")
-                        except:
-                            logger.warning(f"Could not verify that {request.bet_sizes} button is active, but click was successful")
-                        
-                        bet_sizes_clicked = True
-                        break
-                except Exception as e:
-                    logger.info(f"Bet_sizes selector {selector} failed: {str(e)}")
-                    continue
-            
-            if not bet_sizes_clicked:
-                logger.warning(f"Could not find or click bet_sizes button for {request.bet_sizes}, skipping this action")
+        # Verify the filter selections before the dialog (and its buttons) can be closed
+        await log_inactive_buttons(page, plan)
         
-        # Handle rake clicking if provided
-        if request.rake and request.rake.strip():
-            logger.info(f"Now clicking on rake button for: {request.rake}")
-            
-            # Map rake to their corresponding data-tst attributes
-            rake_map = {
-                "Any": "chrow_any",
-                "NL50": "chrow_NL50",
-                "NL500": "chrow_NL500", 
-                "NL50 GG": "chrow_GG NL50",
-                "NL1k GG": "chrow_GG NL1k"
-            }
-            
-            if request.rake not in rake_map:
-                raise Exception(f"Invalid rake value: {request.rake}. Must be one of: Any, NL50, NL500, NL50 GG, NL1k GG")
-            
-            data_tst_value = rake_map[request.rake]
-            
-            # Try multiple selectors for the rake button
-            rake_selectors = [
-                f"div[data-tst='{data_tst_value}']",
-                f"div[data-tst='{data_tst_value}'] span",
-                f"div:has-text('{request.rake}')",
-                f"text={request.rake}",
-                f"div.gw_btn.gw_btn_text.gw_loading_text.cherow_row_checkbox.cherow_row_checkbox_item:has-text('{request.rake}')"
-            ]
-            
-            rake_clicked = False
-            for selector in rake_selectors:
+        # Handle dialog closing if requested - this runs independently of other actions
+        if request.close_dialog:
+            logger.debug("Closing dialog as requested")
+            close_button = await _click_with_fallbacks(page, DIALOG_CLOSE_SELECTORS, "dialog close", timeout=3000)
+            if close_button is not None:
+                # Wait for the button that was actually clicked to go away instead of sleeping for a fixed time
                 try:
-                    logger.info(f"Trying rake selector: {selector}")
-                    element = await page.wait_for_selector(selector, state="visible", timeout=5000)
-                    if element:
-                        await element.click()
-                        logger.info(f"Successfully clicked on rake button for {request.rake}")
-                        
-                        # Wait a moment for the click to register
-                        await page.wait_for_timeout(1000)
-                        
-                        # Verify that the button is now active
-                        active_selector = f"div[data-tst='{data_tst_value}'].gw_btn_active"
-                        try:
-                            await page.wait_for_selector(active_selector, state="visible", timeout=3000)
-                            logger.info(f"Verified that {request.rake} button is now active")
-                        except:
-                            logger.warning(f"Could not verify that {request.rake} button is active, but click was successful")
-                        
-                        rake_clicked = True
-                        break
+                    await close_button.wait_for(state="hidden", timeout=3000)
                 except Exception as e:
-                    logger.info(f"Rake selector {selector} failed: {str(e)}")
-                    continue
-            
-            if not rake_clicked:
-                logger.warning(f"Could not find or click rake button for {request.rake}, skipping this action")
-        
-        # Handle cash_open_size clicking if provided
-        if request.cash_open_size and request.cash_open_size.strip():
-            logger.info(f"Now clicking on cash_open_size button for: {request.cash_open_size}")
-            
-            # Map cash_open_size to their corresponding data-tst attributes
-            # Note: "Any" might conflict with other sections, so we'll rely more on text selectors
-            cash_open_size_map = {
-                "Any": "chrow_any",  # This might conflict, but we have fallback selectors
-                "GTO": "chrow_gto",
-                "2.5x": "chrow_25x"
-            }
-            
-            if request.cash_open_size not in cash_open_size_map:
-                raise Exception(f"Invalid cash_open_size value: {request.cash_open_size}. Must be one of: Any, GTO, 2.5x")
-            
-            data_tst_value = cash_open_size_map[request.cash_open_size]
-            
-            # Try multiple selectors for the cash_open_size button
-            # For "Any", we need to be more specific since it appears in multiple sections
-            if request.cash_open_size == "Any":
-                cash_open_size_selectors = [
-                    # Try to find "Any" button specifically in the opening size section
-                    f"div:has-text('Opening'):has-text('Any')",
-                    f"div:has-text('{request.cash_open_size}'):near(div:has-text('Opening'))",
-                    f"div[data-tst='{data_tst_value}']",
-                    f"div[data-tst='{data_tst_value}'] span",
-                    f"div:has-text('{request.cash_open_size}')",
-                    f"text={request.cash_open_size}",
-                    f"div.gw_btn.gw_btn_text.gw_loading_text.cherow_row_checkbox.cherow_row_checkbox_item:has-text('{request.cash_open_size}')"
-                ]
+                    logger.warning("Dialog close button still visible after click: %s", e)
             else:
-                cash_open_size_selectors = [
-                    f"div[data-tst='{data_tst_value}']",
-                    f"div[data-tst='{data_tst_value}'] span",
-                    f"div:has-text('{request.cash_open_size}')",
-                    f"text={request.cash_open_size}",
-                    f"div.gw_btn.gw_btn_text.gw_loading_text.cherow_row_checkbox.cherow_row_checkbox_item:has-text('{request.cash_open_size}')"
-                ]
-            
-            cash_open_size_clicked = False
-            for selector in cash_open_size_selectors:
-                try:
-                    logger.info(f"Trying cash_open_size selector: {selector}")
-                    element = await page.wait_for_selector(selector, state="visible", timeout=5000)
-                    if element:
-                        await element.click()
-                        logger.info(f"Successfully clicked on cash_open_size button for {request.cash_open_size}")
-                        
-                        # Wait a moment for the click to register
-                        await page.wait_for_timeout(1000)
-                        
-                        # Verify that the button is now active
-                        active_selector = f"div[data-tst='{data_tst_value}'].gw_btn_active"
-                        try:
-                            await page.wait_for_selector(active_selector, state="visible", timeout=3000)
-                            logger.info(f"Verified that {request.cash_open_size} button is now active")
-                        except:
-                            logger.warning(f"Could not verify that {request.cash_open_size} button is active, but click was successful")
-                        
-                        cash_open_size_clicked = True
-                        break
-                except Exception as e:
-                    logger.info(f"Cash_open_size selector {selector} failed: {str(e)}")
-                    continue
-            
-            if not cash_open_size_clicked:
-                logger.warning(f"Could not find or click cash_open_size button for {request.cash_open_size}, skipping this action")
-        
-        # Handle cash_3bet_size clicking if provided
-        if request.cash_3bet_size and request.cash_3bet_size.strip():
-            logger.info(f"Now clicking on cash_3bet_size button for: {request.cash_3bet_size}")
-            
-            # Map cash_3bet_size to their corresponding data-tst attributes
-            # Note: These might conflict with other sections, so we'll use more specific selectors
-            cash_3bet_size_map = {
-                "Any": "chrow_any",
-                "GTO": "chrow_gto", 
-                "Smaller": "chrow_smaller"
-            }
-            
-            if request.cash_3bet_size not in cash_3bet_size_map:
-                raise Exception(f"Invalid cash_3bet_size value: {request.cash_3bet_size}. Must be one of: Any, GTO, Smaller")
-            
-            data_tst_value = cash_3bet_size_map[request.cash_3bet_size]
-            
-            # Try multiple selectors for the cash_3bet_size button
-            # We need to be very specific to target the 3bet size section, not other sections
-            # Use "Smaller" as a reference point since it's unique to the 3bet section
-            if request.cash_3bet_size == "Any":
-                cash_3bet_size_selectors = [
-                    # The "Any" button in 3bet section has NO data-tst attribute
-                    # We need to find the "Any" button that is specifically in the 3bet section
-                    # Look for the "Any" button that comes before the "GTO" button that comes before the "Smaller" button
-                    f"div.gw_btn.gw_btn_text.gw_loading_text.cherow_row_checkbox.cherow_row_checkbox_item:has-text('Any'):near(div[data-tst='chrow_smaller']):not(:has([data-tst]))",
-                    # Try to find "Any" button that is the first button in a row that contains "Smaller"
-                    f"div:has-text('Any'):near(div:has-text('Smaller')):not([data-tst])",
-                    # Look for "Any" button that is near both "GTO" and "Smaller" buttons
-                    f"div:has-text('Any'):near(div:has-text('GTO')):near(div:has-text('Smaller'))",
-                    # Fallback selectors
-                    f"div:has-text('Any'):near(div[data-tst='chrow_smaller'])",
-                    f"div:has-text('{request.cash_3bet_size}')",
-                    f"text={request.cash_3bet_size}",
-                    f"div.gw_btn.gw_btn_text.gw_loading_text.cherow_row_checkbox.cherow_row_checkbox_item:has-text('{request.cash_3bet_size}')"
-                ]
-            elif request.cash_3bet_size == "GTO":
-                cash_3bet_size_selectors = [
-                    # The "GTO" button in 3bet section has data-tst="chrow_gto" but conflicts with opening size section
-                    # We need to find the "GTO" button that is specifically in the 3bet section
-                    # Use a very specific selector that targets the GTO button in the 3bet section by looking for the unique combination
-                    # Find GTO button that is near Smaller (unique to 3bet section) but NOT near 2.5x (unique to opening section)
-                    f"div[data-tst='chrow_gto']:near(div[data-tst='chrow_smaller']):not(:near(div:has-text('2.5x')))",
-                    # Try to find GTO button that is near Smaller but not near Opening
-                    f"div[data-tst='chrow_gto']:near(div[data-tst='chrow_smaller']):not(:near(div:has-text('Opening')))",
-                    # Look for GTO button that is near both Any (no data-tst) and Smaller buttons
-                    f"div[data-tst='chrow_gto']:near(div:has-text('Any'):not([data-tst])):near(div[data-tst='chrow_smaller'])",
-                    # Use CSS sibling selectors to find the GTO button that comes after Any (no data-tst) and before Smaller
-                    f"div:has-text('Any'):not([data-tst]) + div[data-tst='chrow_gto']",
-                    f"div:has-text('Any'):not([data-tst]) ~ div[data-tst='chrow_gto']",
-                    # Look for GTO button that has Smaller as a sibling
-                    f"div[data-tst='chrow_gto']:has(+ div[data-tst='chrow_smaller'])",
-                    f"div[data-tst='chrow_gto']:has(~ div[data-tst='chrow_smaller'])",
-                    # Look for "GTO" button that is near both "Any" and "Smaller" buttons
-                    f"div:has-text('GTO'):near(div:has-text('Any')):near(div:has-text('Smaller'))",
-                    # Fallback selectors
-                    f"div:has-text('{request.cash_3bet_size}'):near(div:has-text('Smaller'))",
-                    f"div:has-text('{request.cash_3bet_size}'):near(div[data-tst='chrow_smaller'])",
-                    f"div[data-tst='{data_tst_value}']",
-                    f"div[data-tst='{data_tst_value}'] span",
-                    f"div:has-text('{request.cash_3bet_size}')",
-                    f"text={request.cash_3bet_size}",
-                    f"div.gw_btn.gw_btn_text.gw_loading_text.cherow_row_checkbox.cherow_row_checkbox_item:has-text('{request.cash_3bet_size}')"
-                ]
-            else:  # Smaller
-                cash_3bet_size_selectors = [
-                    # Try the specific data-tst first (Smaller should be unique)
-                    f"div[data-tst='{data_tst_value}']",
-                    f"div[data-tst='{data_tst_value}'] span",
-                    # Fallback to generic selectors
-                    f"div:has-text('{request.cash_3bet_size}')",
-                    f"text={request.cash_3bet_size}",
-                    f"div.gw_btn.gw_btn_text.gw_loading_text.cherow_row_checkbox.cherow_row_checkbox_item:has-text('{request.cash_3bet_size}')"
-                ]
-            
-            cash_3bet_size_clicked = False
-            for selector in cash_3bet_size_selectors:
-                try:
-                    logger.info(f"Trying cash_3bet_size selector: {selector}")
-                    element = await page.wait_for_selector(selector, state="visible", timeout=5000)
-                    if element:
-                        await element.click()
-                        logger.info(f"Successfully clicked on cash_3bet_size button for {request.cash_3bet_size}")
-                        
-                        # Wait a moment for the click to register
-                        await page.wait_for_timeout(1000)
-                        
-                        # Verify that the button is now active
-                        # Use more specific verification selectors to avoid conflicts
-                        if request.cash_3bet_size == "Any":
-                            # The "Any" button in 3bet section has NO data-tst attribute
-                            active_selector = f"div:has-text('Any'):near(div:has-text('Smaller')):not([data-tst]).gw_btn_active"
-                        elif request.cash_3bet_size == "GTO":
-                            # The "GTO" button in 3bet section has data-tst="chrow_gto" but we need to verify it's the right one
-                            # Verify it's the GTO button that's near the Smaller button and not near 2.5x
-                            active_selector = f"div[data-tst='chrow_gto']:near(div[data-tst='chrow_smaller']):not(:near(div:has-text('2.5x'))).gw_btn_active"
-                        else:  # Smaller
-                            active_selector = f"div[data-tst='{data_tst_value}'].gw_btn_active"
-                        
-                        try:
-                            await page.wait_for_selector(active_selector, state="visible", timeout=3000)
-                            logger.info(f"Verified that {request.cash_3bet_size} button is now active")
-                        except:
-                            logger.warning(f"Could not verify that {request.cash_3bet_size} button is active, but click was successful")
-                        
-                        cash_3bet_size_clicked = True
-                        break
-                except Exception as e:
-                    logger.info(f"Cash_3bet_size selector {selector} failed: {str(e)}")
-                    continue
-            
-            if not cash_3bet_size_clicked:
-                logger.warning(f"Could not find or click cash_3bet_size button for {request.cash_3bet_size}, skipping this action")
-        
-        # Handle hero clicking if provided
-        if request.hero and request.hero.strip():
-            logger.info(f"Now clicking on hero button for: {request.hero}")
-            
-            # Map hero to their corresponding data-tst attributes
-            hero_map = {
-                "Any": None,  # "Any" has no data-tst attribute
-                "OOP": "chrow_oop",
-                "IP": "chrow_ip"
-            }
-            
-            if request.hero not in hero_map:
-                raise Exception(f"Invalid hero value: {request.hero}. Must be one of: Any, OOP, IP")
-            
-            data_tst_value = hero_map[request.hero]
-            
-            # Simple approach: Find the Hero section first, then find the specific button within it
-            hero_clicked = False
-            
-            if request.hero == "OOP":
-                logger.info("Looking for OOP button with exact HTML structure from image")
-                
-                # Try to find and click the OOP button
-                oop_selectors = [
-                    "div[data-tst='chrow_oop']",
-                    "div:has-text('OOP')",
-                    "div.gw_btn:has-text('OOP')"
-                ]
-                
-                for selector in oop_selectors:
-                    try:
-                        logger.info(f"Trying OOP selector: {selector}")
-                        element = await page.wait_for_selector(selector, state="visible", timeout=5000)
-                        if element:
-                            await element.click()
-                            logger.info(f"Successfully clicked on OOP button using selector: {selector}")
-                            await page.wait_for_timeout(1000)
-                            hero_clicked = True
-                            break
-                    except Exception as e:
-                        logger.info(f"OOP selector {selector} failed: {str(e)}")
-                        continue
-            
-            elif request.hero == "IP":
-                logger.info("Looking for IP button")
-                ip_selectors = [
-                    "div[data-tst='chrow_ip']",
-                    "div:has-text('IP')",
-                    "div.gw_btn:has-text('IP')"
-                ]
-                
-                for selector in ip_selectors:
-                    try:
-                        logger.info(f"Trying IP selector: {selector}")
-                        element = await page.wait_for_selector(selector, state="visible", timeout=5000)
-                        if element:
-                            await element.click()
-                            logger.info(f"Successfully clicked on IP button using selector: {selector}")
-                            await page.wait_for_timeout(1000)
-                            hero_clicked = True
-                            break
-                    except Exception as e:
-                        logger.info(f"IP selector {selector} failed: {str(e)}")
-                        continue
-            
-            elif request.hero == "Any":
-                logger.info("Looking for Any button")
-                any_selectors = [
-                    "div:has-text('Any'):not([data-tst])",
-                    "div.gw_btn:has-text('Any')"
-                ]
-                
-                for selector in any_selectors:
-                    try:
-                        logger.info(f"Trying Any selector: {selector}")
-                        element = await page.wait_for_selector(selector, state="visible", timeout=5000)
-                        if element:
-                            await element.click()
-                            logger.info(f"Successfully clicked on Any button using selector: {selector}")
-                            await page.wait_for_timeout(1000)
-                            hero_clicked = True
-                            break
-                    except Exception as e:
-                        logger.info(f"Any selector {selector} failed: {str(e)}")
-                        continue
-            
-            if not hero_clicked:
-                logger.warning(f"Could not find or click hero button for {request.hero}, skipping this action")
-        
-        # Handle dialog closing if requested - this runs independently of other actions
-        if request.close_dialog:
-            logger.info("Closing dialog as requested")
-            try:
-                # Try to find and click the dialog close button using exact HTML from image
-                dialog_close_selectors = [
-                    "div[data-tst='dialog_solutions-dialog_close']",
-                    "div.dialog_content_close.mdi.icon_btn.mdi-close",
-                    "div.mdi-close",
-                    "div[class*='dialog_content_close']"
-                ]
-                
-                dialog_closed = False
-                for selector in dialog_close_selectors:
-                    try:
-                        logger.info(f"Trying dialog close selector: {selector}")
-                        element = await page.wait_for_selector(selector, state="visible", timeout=3000)
-                        if element:
-                            await element.click()
-                            logger.info(f"Successfully closed dialog using selector: {selector}")
-                            await page.wait_for_timeout(3000)  # Wait longer for page to update
-                            dialog_closed = True
-                            break
-                    except Exception as e:
-                        logger.info(f"Dialog close selector {selector} failed: {str(e)}")
-                        continue
-                
-                if not dialog_closed:
-                    logger.warning("Could not find or click dialog close button")
-                    
-            except Exception as e:
-                logger.warning(f"Error closing dialog: {str(e)}")
+                logger.warning("Could not find or click dialog close button")
         
         # Handle START BUILDING button clicking if requested - this runs independently of other actions
         if request.start_building:
-            logger.info("Clicking START BUILDING button as requested")
-            try:
-                # Try to find and click the START BUILDING button using exact HTML from image
-                start_building_selectors = [
-                    "div.gw_btn_primary.gw_btn.-v1",
-                    "div[class*='gw_btn_primary'][class*='gw_btn'][class*='-v1']",
-                    "div:has-text('Start building')",
-                    "div:has-text('START BUILDING')",
-                    "div.gw_btn_primary:has-text('Start building')",
-                    "button:has-text('Start building')",
-                    "button:has-text('START BUILDING')",
-                    "[class*='gw_btn_primary']:has-text('Start building')",
-                    "[class*='gw_btn_primary']:has-text('START BUILDING')"
-                ]
-                
-                start_building_clicked = False
-                for selector in start_building_selectors:
-                    try:
-                        logger.info(f"Trying START BUILDING selector: {selector}")
-                        element = await page.wait_for_selector(selector, state="visible", timeout=3000)
-                        if element:
-                            await element.click()
-                            logger.info(f"Successfully clicked START BUILDING button using selector: {selector}")
-                            await page.wait_for_timeout(1000)
-                            start_building_clicked = True
-                            break
-                    except Exception as e:
-                        logger.info(f"START BUILDING selector {selector} failed: {str(e)}")
-                        continue
-                
-                if not start_building_clicked:
-                    logger.warning("Could not find or click START BUILDING button")
-                    # Debug: Log what buttons are actually available on the page
-                    try:
-                        all_buttons = await page.query_selector_all("div[class*='btn'], button")
-                        logger.info(f"Found {len(all_buttons)} buttons on the page")
-                        for i, btn in enumerate(all_buttons[:5]):  # Log first 5 buttons
-                            try:
-                                text = await btn.text_content()
-                                classes = await btn.get_attribute("class")
-                                logger.info(f"Button {i+1}: text='{text}', classes='{classes}'")
-                            except:
-                                pass
-                    except Exception as debug_e:
-                        logger.info(f"Debug info failed: {str(debug_e)}")
-                    
-            except Exception as e:
-                logger.warning(f"Error clicking START BUILDING button: {str(e)}")
+            logger.debug("Clicking START BUILDING button as requested")
+            if await _click_with_fallbacks(page, START_BUILDING_SELECTORS, "START BUILDING", timeout=3000) is None:
+                logger.warning("Could not find or click START BUILDING button")
+                await log_page_buttons(page)
         
         # Handle Confirm button clicking if requested - this runs independently of other actions
         if request.confirm:
-            logger.info("Clicking Confirm button as requested")
-            try:
-                # Try to find and click the Confirm button using exact HTML from image
-                confirm_selectors = [
-                    "div.gw_btn.gw_btn_primary.text-normal.weight_500",
-                    "div[class*='gw_btn'][class*='gw_btn_primary'][class*='text-normal'][class*='weight_500']",
-                    "div:has-text('Confirm')",
-                    "div.gw_btn_primary:has-text('Confirm')",
-                    "button:has-text('Confirm')",
-                    "[class*='gw_btn_primary']:has-text('Confirm')"
-                ]
-                
-                confirm_clicked = False
-                for selector in confirm_selectors:
-                    try:
-                        logger.info(f"Trying Confirm selector: {selector}")
-                        element = await page.wait_for_selector(selector, state="visible", timeout=3000)
-                        if element:
-                            await element.click()
-                            logger.info(f"Successfully clicked Confirm button using selector: {selector}")
-                            await page.wait_for_timeout(1000)
-                            confirm_clicked = True
-                            break
-                    except Exception as e:
-                        logger.info(f"Confirm selector {selector} failed: {str(e)}")
-                        continue
-                
-                if not confirm_clicked:
-                    logger.warning("Could not find or click Confirm button")
-                    # Debug: Log what buttons are actually available on the page
-                    try:
-                        all_buttons = await page.query_selector_all("div[class*='btn'], button")
-                        logger.info(f"Found {len(all_buttons)} buttons on the page")
-                        for i, btn in enumerate(all_buttons[:5]):  # Log first 5 buttons
-                            try:
-                                text = await btn.text_content()
-                                classes = await btn.get_attribute("class")
-                                logger.info(f"Button {i+1}: text='{text}', classes='{classes}'")
-                            except:
-                                pass
-                    except Exception as debug_e:
-                        logger.info(f"Debug info failed: {str(debug_e)}")
-                    
-            except Exception as e:
-                logger.warning(f"Error clicking Confirm button: {str(e)}")
+            logger.debug("Clicking Confirm button as requested")
+            if await _click_with_fallbacks(page, CONFIRM_SELECTORS, "Confirm", timeout=3000) is None:
+                logger.warning("Could not find or click Confirm button")
+                await log_page_buttons(page)
         
         # Build response message and action based on what was performed
         actions_performed = []
         message_parts = ["Successfully clicked on range selector div"]
         
-        if request.solutions and request.solutions.strip():
-            actions_performed.append(f"clicked_{request.solutions.lower().replace(' ', '_').replace('&', 'and')}")
-            message_parts.append(f"{request.solutions} solutions button")
-        
-        if request.cash_type and request.cash_type.strip():
-            actions_performed.append(f"clicked_{request.cash_type.lower().replace(' ', '_').replace('+', 'plus').replace('&', 'and')}")
-            message_parts.append(f"{request.cash_type} cash_type button")
-        
-        if request.cash_players and request.cash_players.strip():
-            actions_performed.append(f"clicked_{request.cash_players.lower().replace(' ', '_').replace('-', '_')}")
-            message_parts.append(f"{request.cash_players} cash_players button")
-        
-        if request.available_spots and request.available_spots.strip():
-            actions_performed.append(f"clicked_{request.available_spots.lower().replace(' ', '_').replace('-', '_')}")
-            message_parts.append(f"{request.available_spots} available_spots button")
-        
-        if request.cash_stacks and request.cash_stacks.strip():
-            actions_performed.append(f"clicked_{request.cash_stacks.lower()}")
-            message_parts.append(f"{request.cash_stacks} cash_stacks button")
-        
-        if request.bet_sizes and request.bet_sizes.strip():
-            actions_performed.append(f"clicked_{request.bet_sizes.lower()}")
-            message_parts.append(f"{request.bet_sizes} bet_sizes button")
-        
-        if request.rake and request.rake.strip():
-            actions_performed.append(f"clicked_{request.rake.lower().replace(' ', '_').replace('k', 'k')}")
-            message_parts.append(f"{request.rake} rake button")
-        
-        if request.cash_open_size and request.cash_open_size.strip():
-            actions_performed.append(f"clicked_{request.cash_open_size.lower().replace('.', '_')}")
-            message_parts.append(f"{request.cash_open_size} cash_open_size button")
-        
-        if request.cash_3bet_size and request.cash_3bet_size.strip():
-            actions_performed.append(f"clicked_{request.cash_3bet_size.lower()}")
-            message_parts.append(f"{request.cash_3bet_size} cash_3bet_size button")
+        for category, value, _ in plan:
+            actions_performed.append(SLUG_TABLE[(category, value)])
+            message_parts.append(BUTTON_MESSAGES[(category, value)])
         
-        if request.hero and request.hero.strip():
-            actions_performed.append(f"clicked_{request.hero.lower()}")
-            message_parts.append(f"{request.hero} hero button")
-        
-        if request.close_dialog:
-            actions_performed.append("closed_dialog")
-            message_parts.append("dialog close button")
-        
-        if request.start_building:
-            actions_performed.append("clicked_start_building")
-            message_parts.append("START BUILDING button")
-        
-        if request.confirm:
-            actions_performed.append("clicked_confirm")
-            message_parts.append("Confirm button")
+        for field_name, slug, description in ONE_SHOT_ACTIONS:
+            if getattr(request, field_name):
+                actions_performed.append(slug)
+                message_parts.append(description)
         
         action_performed = "_and_".join(actions_performed) if actions_performed else "clicked_range_selector"
         message = " and ".join(message_parts)
         
-        logger.info(f"Successfully completed all actions in session {session_id}: {message}")
+        logger.info("Successfully completed all actions in session %s: %s", session_id, message)
         
-        return GetRangeResponse(
+        response = GetRangeResponse(
             session_id=session_id,
             status="success",
             message=message,
             action_performed=action_performed
         )
         
+        if cacheable:
+            app.state.range_cache[session_id] = (cache_key, time.monotonic(), response)
+        
+        return response
+        
     except Exception as e:
-        logger.error(f"Error performing get-range action in session {session_id}: {str(e)}")
+        logger.error("Error performing get-range action in session %s: %s", session_id, e)
         raise HTTPException(status_code=500, detail=f"Failed to perform get-range action: {str(e)}")
+    finally:
+        page_ops.release()
+        lock.release()
+
+async def navigate(page, url: str) -> bool:
+    """
+    Navigate to the URL and wait for the app itself rather than for the network to go quiet
+    """
+    await page.goto(url, wait_until='domcontentloaded')
+    try:
+        await page.wait_for_selector(READY_SELECTOR, state="visible", timeout=30000)
+        return True
+    except Exception as e:
+        logger.warning("GTO Wizard app did not render after navigation, but continuing: %s", e)
+        return False
+
+def load_storage_state() -> Optional[dict]:
+    """
+    Load the storage state saved by a previous run, if there is one
+    """
+    if not STORAGE_STATE_PATH or not os.path.exists(STORAGE_STATE_PATH):
+        return None
+    
+    try:
+        with open(STORAGE_STATE_PATH, "rb") as f:
+            return orjson.loads(f.read())
+    except Exception as e:
+        logger.warning("Could not load storage state from %s, starting without it: %s", STORAGE_STATE_PATH, e)
+        return None
+
+def host_matches(hostname: Optional[str], domain: str) -> bool:
+    """
+    Check whether a hostname is the given domain or one of its subdomains
+    """
+    return bool(hostname) and (hostname == domain or hostname.endswith("." + domain))
+
+def is_blocked_host(hostname: Optional[str]) -> bool:
+    """
+    Check whether a hostname belongs to one of the blocked third-party services
+    """
+    return any(host_matches(hostname, host) for host in BLOCKED_HOSTS)
+
+def names_tracker(hostname: Optional[str], path: str) -> bool:
+    """
+    Check whether a host label or path segment starts with one of the blocked tracker keywords
+    """
+    return bool(
+        (hostname and KEYWORD_HOST_PATTERN.search(hostname))
+        or KEYWORD_PATH_PATTERN.search(path.lower())
+    )
+
+async def block_unneeded_requests(route):
+    """
+    Route handler that aborts images, fonts, media, beacons, third-party CSS and analytics
+    """
+    request = route.request
+    resource_type = request.resource_type
+    url = request.url
+    parsed = urlparse(url)
+    hostname = parsed.hostname
+    # data: and blob: URLs have no host; they are built by the page itself, so count as first-party
+    third_party = hostname is not None and not host_matches(hostname, FIRST_PARTY_DOMAIN)
+    if (
+        resource_type in BLOCKED_RESOURCE_TYPES
+        or (third_party and resource_type == "stylesheet")
+        or is_blocked_host(hostname)
+        or (third_party and resource_type in KEYWORD_RESOURCE_TYPES and names_tracker(hostname, parsed.path))
+    ):
+        await route.abort()
+    else:
+        await route.continue_()
+
+async def open_page(url: str):
+    """
+    Open a new browser context in the shared browser and navigate a page to the given URL
+    """
+    async with app.state.page_ops:
+        context = await app.state.browser.new_context(**CONTEXT_OPTIONS, storage_state=app.state.storage_state)
+        
+        try:
+            await context.route("**/*", block_unneeded_requests)
+            page = await context.new_page()
+            rendered = await navigate(page, url)
+            
+            if rendered and STORAGE_STATE_PATH and not app.state.storage_state_claimed:
+                # First context to get the app running: keep its state for every context after it.
+                # The claim is taken before awaiting so no other context writes the file at the same time
+                app.state.storage_state_claimed = True
+                try:
+                    app.state.storage_state = await context.storage_state(path=STORAGE_STATE_PATH)
+                except Exception:
+                    app.state.storage_state_claimed = False
+                    raise
+                logger.info("Saved browser storage state to %s", STORAGE_STATE_PATH)
+        except Exception:
+            await context.close()
+            raise
+    
+    return context, page
+
+def refill_pool():
+    """
+    Start warming up contexts for every pool slot that is neither filled nor already being filled
+    """
+    while app.state.pool.qsize() + app.state.pool_refills < POOL_SIZE:
+        app.state.pool_refills += 1
+        spawn_background_task(fill_pool())
+
+async def fill_pool():
+    """
+    Warm up one browser context and add it to the pool
+    """
+    try:
+        context, page = await open_page(GTO_WIZARD_URL)
+    except Exception as e:
+        logger.error("Error warming up pooled browser context: %s", e)
+        return
+    finally:
+        app.state.pool_refills -= 1
+    
+    try:
+        app.state.pool.put_nowait((context, page))
+        logger.info("Added warm browser context to pool (%s/%s)", app.state.pool.qsize(), POOL_SIZE)
+    except asyncio.QueueFull:
+        await context.close()
 
 async def launch_browser_session(session_id: str, url: str):
     """
     Launch a browser session with Playwright
     """
     try:
-        playwright = await async_playwright().start()
-        
-        # Launch browser (you can customize these options)
-        browser = await playwright.firefox.launch(
-            headless=False  # Set to True for headless mode
-        )
-        
-        # Create new context and page
-        context = await browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        )
-        
-        page = await context.new_page()
-        
         # Navigate to the URL
-        logger.info(f"Navigating to GTO Wizard URL for session {session_id}")
-        await page.goto(url, wait_until='networkidle')
+        logger.info("Navigating to GTO Wizard URL for session %s", session_id)
+        context, page = await open_page(url)
+        
+        session_info = app.state.sessions.get(session_id)
+        if session_info is None:
+            # The session was closed while the browser was still launching
+            logger.info("Session %s was closed during launch, closing its browser context", session_id)
+            await context.close()
+            return
         
         # Update session status
-        active_sessions[session_id].update({
-            "status": "active",
-            "browser": browser,
-            "context": context,
-            "page": page,
-            "playwright": playwright
-        })
+        session_info.context = context
+        session_info.page = page
+        session_info.status = "active"
+        session_info.ready.set()
+        app.state.sessions_listing = None
         
-        logger.info(f"Browser session {session_id} is now active")
+        logger.info("Browser session %s is now active", session_id)
         
         # Keep the browser open (you can add logic here to handle session termination)
         # For now, we'll keep it running indefinitely
         
     except Exception as e:
-        logger.error(f"Error in browser session {session_id}: {str(e)}")
-        active_sessions[session_id]["status"] = "error"
-        active_sessions[session_id]["error"] = str(e)
+        logger.error("Error in browser session %s: %s", session_id, e)
+        session_info = app.state.sessions.get(session_id)
+        if session_info is not None:
+            session_info.status = "error"
+            session_info.error = str(e)
+            session_info.ready.set()
+            app.state.sessions_listing = None
 
 @app.get("/sessions")
 async def list_sessions():
     """
     List all active browser sessions
     """
-    session_list = []
-    for session_id, session_info in active_sessions.items():
-        session_list.append({
-            "session_id": session_id,
-            "status": session_info["status"],
-            "url": session_info["url"],
-            "created_at": session_info["created_at"]
+    # Sessions change far less often than they are listed, so the encoded body is reused until they do
+    if app.state.sessions_listing is None:
+        app.state.sessions_listing = orjson.dumps({
+            "sessions": [
+                {
+                    "session_id": session_id,
+                    "status": session_info.status,
+                    "url": session_info.url,
+                    "created_at": session_info.created_at,
+                    "worker_pid": session_info.worker_pid
+                }
+                for session_id, session_info in app.state.sessions.items()
+            ],
+            "total": len(app.state.sessions)
         })
     
-    return {"sessions": session_list, "total": len(session_list)}
+    return Response(content=app.state.sessions_listing, media_type="application/json")
 
 @app.get("/sessions/{session_id}")
 async def get_session_status(session_id: str):
     """
     Get status of a specific browser session
     """
-    if session_id not in active_sessions:
+    if session_id not in app.state.sessions:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session_info = active_sessions[session_id]
+    session_info = app.state.sessions[session_id]
     return {
         "session_id": session_id,
-        "status": session_info["status"],
-        "url": session_info["url"],
-        "created_at": session_info["created_at"]
+        "status": session_info.status,
+        "url": session_info.url,
+        "created_at": session_info.created_at,
+        "worker_pid": session_info.worker_pid
     }
 
+async def close_session_resources(session_info: Session):
+    """
+    Close the Playwright resources held by a session
+    """
+    if session_info.status == "active":
+        # Only the session's own page and context are closed; the browser is shared
+        if session_info.context is not None:
+            # Closing the context closes its page too, in a single round-trip
+            await session_info.context.close()
+        elif session_info.page is not None:
+            await session_info.page.close()
+
+async def end_session(session_id: str):
+    """
+    Remove a session from the store and release its browser context
+    """
+    # Remove from active sessions before awaiting so concurrent requests stop seeing it
+    session_info = app.state.sessions.pop(session_id, None)
+    if session_info is None:
+        return
+    app.state.range_cache.pop(session_id, None)
+    app.state.sessions_listing = None
+    
+    # Wake any /get-range still waiting for this session to finish launching
+    session_info.ready.set()
+    
+    # Let any in-flight /get-range finish with the page first. The context is closed rather than
+    # reused: its storage belongs to the client that just left
+    async with session_info.lock:
+        await close_session_resources(session_info)
+    
+    # Top the pool back up in case an earlier refill failed
+    refill_pool()
+
+async def reap_sessions():
+    """
+    Periodically close sessions that have sat idle too long or are stuck in the error or launching state
+    """
+    while True:
+        await asyncio.sleep(REAPER_INTERVAL)
+        now = time.monotonic()
+        
+        for session_id, session_info in list(app.state.sessions.items()):
+            idle = now - session_info.last_used_at
+            expired = (
+                idle > SESSION_TTL
+                or (session_info.status == "error" and idle > ERROR_SESSION_TTL)
+                or (session_info.status == "launching" and idle > LAUNCH_SESSION_TTL)
+            )
+            
+            # Never reap a session that is in the middle of a /get-range
+            if not expired or session_info.lock.locked():
+                continue
+            
+            try:
+                await end_session(session_id)
+                logger.info("Reaped browser session %s (status %s, idle %.0fs)", session_id, session_info.status, idle)
+            except Exception as e:
+                logger.error("Error reaping session %s: %s", session_id, e)
+
 @app.delete("/sessions/{session_id}")
 async def close_session(session_id: str):
     """
     Close a browser session
     """
-    if session_id not in active_sessions:
+    if session_id not in app.state.sessions:
         raise HTTPException(status_code=404, detail="Session not found")
     
     try:
-        session_info = active_sessions[session_id]
-        
-        if session_info["status"] == "active":
-            # Close browser resources
-            if "page" in session_info:
-                await session_info["page"].close()
-            if "context" in session_info:
-                await session_info["context"].close()
-            if "browser" in session_info:
-                await session_info["browser"].close()
-            if "playwright" in session_info:
-                await session_info["playwright"].stop()
-        
-        # Remove from active sessions
-        del active_sessions[session_id]
+        await end_session(session_id)
         
-        logger.info(f"Closed browser session: {session_id}")
+        logger.info("Closed browser session: %s", session_id)
         return {"message": f"Session {session_id} closed successfully"}
         
     except Exception as e:
-        logger.error(f"Error closing session {session_id}: {str(e)}")
+        logger.error("Error closing session %s: %s", session_id, e)
         raise HTTPException(status_code=500, detail=f"Failed to close session: {str(e)}")
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvloop is not available on Windows; fall back to the default asyncio loop there
+    # Sessions and their browser handles live in the process that created them, so this always runs
+    # a single worker; scale out by starting more processes on other PORTs behind a session-aware proxy
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "8000")),
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools"
+    )
@@ -10,11 +10,11 @@ from typing import Dict, Any
 
 BASE_URL = "http://localhost:8000"
 
-def test_create_session() -> Dict[str, Any]:
+def test_create_session(session: requests.Session) -> Dict[str, Any]:
     """Test creating a new browser session"""
     print("Testing session creation...")
     
-    response = requests.post(
+    response = session.post(
         f"{BASE_URL}/create",
         json={"action": "create"}
     )
@@ -31,28 +31,28 @@ def test_create_session() -> Dict[str, Any]:
         print(f"   Response: {response.text}")
         return {}
 
-def test_list_sessions():
+def test_list_sessions(session: requests.Session):
     """Test listing all sessions"""
     print("\nTesting session listing...")
     
-    response = requests.get(f"{BASE_URL}/sessions")
+    response = session.get(f"{BASE_URL}/sessions")
     
     if response.status_code == 200:
         data = response.json()
         print(f"✅ Sessions listed successfully!")
         print(f"   Total sessions: {data['total']}")
         
-        for session in data['sessions']:
-            print(f"   - {session['session_id']}: {session['status']}")
+        for session_info in data['sessions']:
+            print(f"   - {session_info['session_id']}: {session_info['status']}")
     else:
         print(f"❌ Failed to list sessions: {response.status_code}")
         print(f"   Response: {response.text}")
 
-def test_get_session_status(session_id: str):
+def test_get_session_status(session: requests.Session, session_id: str):
     """Test getting session status"""
     print(f"\nTesting session status for {session_id}...")
     
-    response = requests.get(f"{BASE_URL}/sessions/{session_id}")
+    response = session.get(f"{BASE_URL}/sessions/{session_id}")
     
     if response.status_code == 200:
         data = response.json()
@@ -63,11 +63,11 @@ def test_get_session_status(session_id: str):
         print(f"❌ Failed to get session status: {response.status_code}")
         print(f"   Response: {response.text}")
 
-def test_close_session(session_id: str):
+def test_close_session(session: requests.Session, session_id: str):
     """Test closing a session"""
     print(f"\nTesting session closure for {session_id}...")
     
-    response = requests.delete(f"{BASE_URL}/sessions/{session_id}")
+    response = session.delete(f"{BASE_URL}/sessions/{session_id}")
     
     if response.status_code == 200:
         data = response.json()
@@ -77,11 +77,11 @@ def test_close_session(session_id: str):
         print(f"❌ Failed to close session: {response.status_code}")
         print(f"   Response: {response.text}")
 
-def test_invalid_action():
+def test_invalid_action(session: requests.Session):
     """Test invalid action parameter"""
     print("\nTesting invalid action...")
     
-    response = requests.post(
+    response = session.post(
         f"{BASE_URL}/create",
         json={"action": "invalid"}
     )
@@ -94,12 +94,18 @@ def test_invalid_action():
 
 def main():
     """Main test function"""
+    # One HTTP session for every call so the connection to the API is kept alive between tests
+    with requests.Session() as session:
+        run_tests(session)
+
+def run_tests(session: requests.Session):
+    """Run the test sequence against the API"""
     print("🚀 Starting GTO Wizard Browser Controller API Tests")
     print("=" * 50)
     
     # Test root endpoint
     try:
-        response = requests.get(f"{BASE_URL}/")
+        response = session.get(f"{BASE_URL}/")
         if response.status_code == 200:
             print("✅ API is running and accessible")
         else:
@@ -110,10 +116,10 @@ def main():
         return
     
     # Test invalid action first
-    test_invalid_action()
+    test_invalid_action(session)
     
     # Test session creation
-    session_data = test_create_session()
+    session_data = test_create_session(session)
     if not session_data:
         print("❌ Cannot continue tests without a valid session")
         return
@@ -125,22 +131,22 @@ def main():
     time.sleep(3)
     
     # Test getting session status
-    test_get_session_status(session_id)
+    test_get_session_status(session, session_id)
     
     # Test listing sessions
-    test_list_sessions()
+    test_list_sessions(session)
     
     # Wait a bit more to see the browser
     print("\n⏳ Keeping browser open for 10 seconds so you can see it...")
     time.sleep(10)
     
     # Test closing session
-    test_close_session(session_id)
+    test_close_session(session, session_id)
     
     # Verify session is closed
     print("\n⏳ Verifying session closure...")
     time.sleep(2)
-    test_list_sessions()
+    test_list_sessions(session)
     
     print("\n🎉 All tests completed!")
 